@@ -1,12 +1,21 @@
 import pandas as pd
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from flask import Flask, render_template, request, jsonify, g
+from itsdangerous import URLSafeSerializer, BadSignature
 from openai import OpenAI
 import os
 import config
 import re
 import json
+import sys
+import hashlib
+import threading
+import bisect
+import heapq
+import unicodedata
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 # === Flask アプリケーションの設定 ===
@@ -25,6 +34,42 @@ selected_patent = None
 vectorizer = None
 tfidf_matrix = None
 search_texts = None
+substring_fields = None        # 文字列マッチ用の小文字化済み (名称, 要約, 所管部課名)
+ngram_postings = None          # 文字バイグラム -> 文書番号リスト
+suggest_index = None           # 入力補完用 (ソート済みキー, 候補, 順位配列, 短いプレフィックスの上位候補) の組
+index_version = 0              # 検索インデックス再構築のたびに増加（キャッシュ無効化用）
+
+# === 検索結果キャッシュ設定 ===
+# config.py に未定義の場合はデフォルト値を使用
+SEARCH_CACHE_MAX_BYTES = getattr(config, 'SEARCH_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+SEARCH_CACHE_MAX_CANDIDATES = getattr(config, 'SEARCH_CACHE_MAX_CANDIDATES', 200)
+SEARCH_PAGE_SIZE_MAX = getattr(config, 'SEARCH_PAGE_SIZE_MAX', 50)
+
+search_result_cache = OrderedDict()   # キャッシュキー -> (ランキング, 推定サイズ)
+search_result_cache_bytes = 0
+search_result_cache_lock = threading.Lock()
+
+# 自然言語クエリの解析結果メモ（同一クエリでのLLM呼び出しを省略）
+PARSED_QUERY_MEMO_SIZE = getattr(config, 'PARSED_QUERY_MEMO_SIZE', 256)
+parsed_query_memo = OrderedDict()     # 正規化済みクエリ -> 解析結果
+
+# === ハイブリッドランキング設定 ===
+# 'rrf'（Reciprocal Rank Fusion）または 'weighted'（正規化スコアの重み付き和）
+SEARCH_FUSION_METHOD = getattr(config, 'SEARCH_FUSION_METHOD', 'rrf')
+SEARCH_FUSION_WEIGHTS = getattr(config, 'SEARCH_FUSION_WEIGHTS', {'tfidf': 1.0, 'substring': 1.0})
+SEARCH_RRF_K = getattr(config, 'SEARCH_RRF_K', 60)
+SEARCH_FUSION_METHODS = ('rrf', 'weighted')
+
+# 設定ミスで黙ってRRFに切り替わらないよう起動時に検証
+if SEARCH_FUSION_METHOD not in SEARCH_FUSION_METHODS:
+    raise ValueError(
+        f"SEARCH_FUSION_METHOD の値が不正です: {SEARCH_FUSION_METHOD!r}"
+        f"（{' / '.join(SEARCH_FUSION_METHODS)} のいずれかを指定してください）"
+    )
+
+# === 入力補完設定 ===
+SUGGEST_LIMIT_MAX = getattr(config, 'SUGGEST_LIMIT_MAX', 20)
+SUGGEST_PRECOMPUTED_PREFIX_LEN = 2   # この文字数以下のプレフィックスは上位候補を事前計算
 
 # === OpenAI クライアント初期化 ===
 client = OpenAI(api_key=config.OPENAI_API_KEY)
@@ -52,7 +97,7 @@ def load_patent_csv():
 
 def initialize_search_system():
     """検索システムの初期化（TF-IDFベクトル化）"""
-    global patent_df, vectorizer, tfidf_matrix, search_texts
+    global patent_df, vectorizer, tfidf_matrix, search_texts, substring_fields, ngram_postings, suggest_index, index_version
     
     if patent_df is None:
         print("特許データが読み込まれていません")
@@ -80,7 +125,19 @@ def initialize_search_system():
         
         tfidf_matrix = vectorizer.fit_transform(search_texts)
         
-        print(f"検索システムを初期化しました: {tfidf_matrix.shape}")
+        # 文字列マッチ用のバイグラム転置インデックスを構築
+        substring_fields, ngram_postings = build_substring_index(patent_df)
+        
+        # 入力補完用のプレフィックス索引を構築（語彙・名称・出願人）
+        suggest_index = build_suggest_index(patent_df, vectorizer, tfidf_matrix)
+        
+        # インデックス再構築に伴い検索結果キャッシュを無効化
+        index_version += 1
+        clear_search_cache()
+        
+        print(f"検索システムを初期化しました: {tfidf_matrix.shape} (インデックス版: {index_version})")
+        print(f"文字バイグラム数: {len(ngram_postings)}")
+        print(f"入力補完候補数: {len(suggest_index[0])}")
         
         # 語彙の詳細確認
         feature_names = vectorizer.get_feature_names_out()
@@ -151,15 +208,41 @@ JSON形式で返答してください（説明文は不要）：
     except Exception as e:
         print(f"クエリ解析エラー: {e}")
         # フォールバック：シンプルなキーワード検索として扱う
-        return {
-            "keywords": [query],
-            "date_range": None,
-            "inventor_conditions": None,
-            "applicant_conditions": None,
-            "law_type": None,
-            "limit": 3,
-            "sort_order": "relevance"
-        }
+        return default_parsed_query(query)
+
+def default_parsed_query(query):
+    """解析失敗時に使うシンプルなキーワード検索用の構造化データ"""
+    return {
+        "keywords": [query],
+        "date_range": None,
+        "inventor_conditions": None,
+        "applicant_conditions": None,
+        "law_type": None,
+        "limit": 3,
+        "sort_order": "relevance"
+    }
+
+def parse_natural_query_cached(query):
+    """解析結果をメモして同一クエリの再解析（LLM呼び出し）を省略"""
+    # 出願人・発明者の条件は大文字小文字を区別して照合するため、空白の正規化のみ行う
+    memo_key = ' '.join(query.split())
+    
+    with search_result_cache_lock:
+        parsed_query = parsed_query_memo.get(memo_key)
+        if parsed_query is not None:
+            parsed_query_memo.move_to_end(memo_key)
+            return dict(parsed_query)
+    
+    parsed_query = parse_natural_query(query)
+    
+    # 解析失敗時のフォールバック結果はメモしない（次回に再解析させる）
+    if parsed_query != default_parsed_query(query):
+        with search_result_cache_lock:
+            parsed_query_memo[memo_key] = dict(parsed_query)
+            while len(parsed_query_memo) > PARSED_QUERY_MEMO_SIZE:
+                parsed_query_memo.popitem(last=False)
+    
+    return parsed_query
 
 def estimate_gender_from_name(name):
     """日本人名から性別を推定（簡易版）"""
@@ -278,40 +361,35 @@ def apply_advanced_filters(df, parsed_query):
         print(f"フィルタリングエラー: {e}")
         return filtered_df
 
-def advanced_search(query, top_k=3):
-    """自然言語クエリによる高度な特許検索"""
+def advanced_search_parsed(query, parsed_query, max_results):
+    """解析済みの構造化クエリで高度検索を実行（関連度順の上位max_results件）
+    
+    sort_order による日付順の並べ替えは、表示するページ内で sort_by_registration_date() が行う。
+    """
     global patent_df
     
     if patent_df is None:
         return []
     
     try:
-        # 1. 自然言語クエリを解析
-        parsed_query = parse_natural_query(query)
-        
-        # 2. 指定された件数を取得
-        limit = parsed_query.get('limit', top_k)
-        if limit is None:
-            limit = top_k
-        
-        # 3. 高度なフィルタリングを適用
+        # 1. 高度なフィルタリングを適用
         filtered_df = apply_advanced_filters(patent_df, parsed_query)
         
         if len(filtered_df) == 0:
             return []
         
-        # 4. キーワード検索（TF-IDFまたはフォールバック）
+        # 2. キーワード検索（TF-IDFまたはフォールバック）
         keywords = parsed_query.get('keywords', [])
         if keywords:
             # 複数キーワードを結合
             keyword_query = ' '.join(keywords)
             
             # フィルタリング済みデータでTF-IDF検索を実行
-            search_results = search_patents_on_filtered_data(keyword_query, filtered_df, limit)
+            search_results = search_patents_on_filtered_data(keyword_query, filtered_df, max_results)
         else:
             # キーワードなしの場合は、フィルタ結果をそのまま使用
             search_results = []
-            for idx, row in filtered_df.head(limit).iterrows():
+            for idx, row in filtered_df.head(max_results).iterrows():
                 search_results.append({
                     'index': int(idx),
                     'similarity': 1.0,  # フィルタ条件に完全マッチ
@@ -322,22 +400,23 @@ def advanced_search(query, top_k=3):
                     'match_type': 'advanced_filter'
                 })
         
-        # 5. ソート順を適用
-        sort_order = parsed_query.get('sort_order', 'relevance')
-        if sort_order == 'newest':
-            # 登録日順（新しい順）
-            search_results = sorted(search_results, key=lambda x: patent_df.iloc[x['index']].get('登録日', ''), reverse=True)
-        elif sort_order == 'oldest':
-            # 登録日順（古い順）
-            search_results = sorted(search_results, key=lambda x: patent_df.iloc[x['index']].get('登録日', ''))
-        # relevanceの場合は既に類似度順
-        
-        return search_results[:limit]
+        return search_results[:max_results]
         
     except Exception as e:
         print(f"高度検索エラー: {e}")
         # フォールバック：通常検索
-        return search_patents(query, top_k)
+        return search_patents(query, max_results)
+
+def sort_by_registration_date(results, sort_order):
+    """sort_order に従って検索結果を登録日順に並べ替え（relevanceの場合はそのまま）"""
+    if sort_order == 'newest':
+        # 登録日順（新しい順）
+        return sorted(results, key=lambda x: patent_df.iloc[x['index']].get('登録日', ''), reverse=True)
+    elif sort_order == 'oldest':
+        # 登録日順（古い順）
+        return sorted(results, key=lambda x: patent_df.iloc[x['index']].get('登録日', ''))
+    # relevanceの場合は既に類似度順
+    return results
 
 def search_patents_on_filtered_data(query, filtered_df, top_k=3):
     """フィルタリング済みデータでTF-IDF検索を実行"""
@@ -391,8 +470,59 @@ def search_patents_on_filtered_data(query, filtered_df, top_k=3):
         print(f"フィルタ済みTF-IDF検索エラー: {e}")
         return []
 
+def build_substring_index(df):
+    """文字列マッチ用に小文字化したフィールドと文字バイグラムの転置インデックスを構築"""
+    fields_list = []
+    postings = {}
+    
+    for doc_id, (_, row) in enumerate(df.iterrows()):
+        fields = tuple(str(row.get(col, '')).lower() for col in ('名称', '要約', '所管部課名'))
+        fields_list.append(fields)
+        
+        grams = set()
+        for text in fields:
+            grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        for gram in grams:
+            postings.setdefault(gram, []).append(doc_id)
+    
+    return fields_list, postings
+
+def substring_match_score(fields, query_lower):
+    """名称・要約・所管部課名での出現回数からマッチ度を計算（最大21点）"""
+    name, summary, department = fields
+    
+    # マッチ度計算（出現回数に上限を設定）
+    name_matches = min(name.count(query_lower), 3) * 3        # 名称マッチ最大9点
+    summary_matches = min(summary.count(query_lower), 5) * 2  # 要約マッチ最大10点
+    department_matches = min(department.count(query_lower), 2) # 部課名マッチ最大2点
+    
+    return name_matches + summary_matches + department_matches
+
+def substring_candidates(query_lower):
+    """バイグラム転置インデックスから部分文字列一致の候補文書を絞り込む"""
+    if len(query_lower) < 2:
+        # 1文字クエリはバイグラムで絞り込めないため全件を候補とする
+        return range(len(substring_fields))
+    
+    grams = {query_lower[i:i + 2] for i in range(len(query_lower) - 1)}
+    posting_lists = []
+    for gram in grams:
+        posting = ngram_postings.get(gram)
+        if not posting:
+            return []
+        posting_lists.append(posting)
+    
+    # 短いリストから順に積集合を取る
+    posting_lists.sort(key=len)
+    candidates = set(posting_lists[0])
+    for posting in posting_lists[1:]:
+        candidates.intersection_update(posting)
+        if not candidates:
+            break
+    return sorted(candidates)
+
 def fallback_search(query, top_k=3):
-    """フォールバック検索（文字列マッチング）"""
+    """フォールバック検索（文字列マッチング、検索システム未初期化時に使用）"""
     global patent_df
     
     if patent_df is None:
@@ -403,16 +533,8 @@ def fallback_search(query, top_k=3):
     
     for idx, row in patent_df.iterrows():
         # 検索対象テキスト
-        name = str(row.get('名称', '')).lower()
-        summary = str(row.get('要約', '')).lower()
-        department = str(row.get('所管部課名', '')).lower()
-        
-        # マッチ度計算（出現回数に上限を設定）
-        name_matches = min(name.count(query_lower), 3) * 3        # 名称マッチ最大9点
-        summary_matches = min(summary.count(query_lower), 5) * 2  # 要約マッチ最大10点
-        department_matches = min(department.count(query_lower), 2) # 部課名マッチ最大2点
-        
-        match_score = name_matches + summary_matches + department_matches
+        fields = tuple(str(row.get(col, '')).lower() for col in ('名称', '要約', '所管部課名'))
+        match_score = substring_match_score(fields, query_lower)
         
         if match_score > 0:
             # 類似度を0.0-1.0の範囲に正規化（最大21点）
@@ -442,93 +564,366 @@ def fallback_search(query, top_k=3):
     
     return matches[:top_k]
 
+def fuse_signal_scores(signal_scores, method=None, weights=None, top_k=None):
+    """シグナル別スコアを統合し、(文書番号, 統合スコア) を降順で返す（top_k指定時は上位のみ）
+    
+    signal_scores: {シグナル名: {文書番号: スコア}}
+    統合スコアは全シグナルで1位・満点の場合に1.0となるよう正規化する。
+    """
+    method = method or SEARCH_FUSION_METHOD
+    weights = weights or SEARCH_FUSION_WEIGHTS
+    
+    if method not in SEARCH_FUSION_METHODS:
+        raise ValueError(f"未対応の統合方式です: {method!r}")
+    
+    fused = {}
+    total_weight = 0.0
+    for signal, scores in signal_scores.items():
+        weight = weights.get(signal, 1.0)
+        total_weight += weight
+        if not scores:
+            continue
+        
+        if method == 'weighted':
+            # 最大値で正規化したスコアの重み付き和
+            max_score = max(scores.values())
+            for doc_id, score in scores.items():
+                fused[doc_id] = fused.get(doc_id, 0.0) + weight * (score / max_score)
+        elif method == 'rrf':
+            # Reciprocal Rank Fusion（同点は文書番号順で順位付け）
+            ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+            for rank, (doc_id, _) in enumerate(ranked, start=1):
+                fused[doc_id] = fused.get(doc_id, 0.0) + weight / (SEARCH_RRF_K + rank)
+    
+    if method == 'weighted':
+        max_fused = total_weight
+    else:
+        max_fused = total_weight / (SEARCH_RRF_K + 1)
+    
+    if max_fused <= 0:
+        return []
+    
+    normalized = ((doc_id, score / max_fused) for doc_id, score in fused.items())
+    if top_k is None:
+        return sorted(normalized, key=lambda x: (-x[1], x[0]))
+    return heapq.nsmallest(top_k, normalized, key=lambda x: (-x[1], x[0]))
+
+def hybrid_rank(query, top_k):
+    """TF-IDFと部分文字列マッチの候補を1パスで収集し、統合ランキングの上位top_k件を返す"""
+    # シグナル1: TF-IDF（疎行列との内積でコサイン類似度を計算）
+    query_vector = vectorizer.transform([query])
+    print(f"クエリベクトル非ゼロ要素数: {query_vector.nnz}")
+    
+    tfidf_scores = {}
+    if query_vector.nnz == 0:
+        print("クエリが語彙に含まれていません - 文字列マッチのみで順位付け")
+    else:
+        similarities = (tfidf_matrix @ query_vector.T).toarray().ravel()
+        for doc_id in (similarities > 0.001).nonzero()[0]:
+            tfidf_scores[int(doc_id)] = float(similarities[doc_id])
+    
+    # シグナル2: 部分文字列マッチ（バイグラム転置インデックスで候補を絞り込み）
+    query_lower = query.lower()
+    max_possible_score = 21  # 9 + 10 + 2
+    substring_scores = {}
+    for doc_id in substring_candidates(query_lower):
+        match_score = substring_match_score(substring_fields[doc_id], query_lower)
+        if match_score > 0:
+            substring_scores[doc_id] = min(match_score / max_possible_score, 1.0)
+    
+    print(f"候補数: TF-IDF {len(tfidf_scores)}件 / 文字列マッチ {len(substring_scores)}件")
+    
+    fused = fuse_signal_scores({'tfidf': tfidf_scores, 'substring': substring_scores}, top_k=top_k)
+    
+    # 行の参照は上位top_k件のみ
+    results = []
+    for doc_id, rank_score in fused:
+        patent = patent_df.iloc[doc_id]
+        scores = {
+            'tfidf': tfidf_scores.get(doc_id, 0.0),
+            'substring': substring_scores.get(doc_id, 0.0)
+        }
+        results.append({
+            'index': doc_id,
+            # TF-IDFと文字列マッチのスコアは尺度が異なるため、類似度には統合スコアを用いる
+            'similarity': float(rank_score),
+            'rank_score': float(rank_score),
+            'application_number': patent.get('出願番号', ''),
+            'name': patent.get('名称', ''),
+            'applicant': patent.get('筆頭出願人', ''),
+            'inventor': patent.get('発明者 1', ''),
+            'match_type': '+'.join(signal for signal, value in scores.items() if value > 0),
+            'scores': scores
+        })
+    
+    return results
+
 def search_patents(query, top_k=3):
-    """ハイブリッド特許検索（TF-IDF + フォールバック）"""
+    """ハイブリッド特許検索（TF-IDF + 部分文字列マッチの統合ランキング）"""
     global patent_df, vectorizer, tfidf_matrix
     
-    if patent_df is None or vectorizer is None or tfidf_matrix is None:
+    if patent_df is None or vectorizer is None or tfidf_matrix is None or ngram_postings is None:
         print("検索システムが初期化されていません")
         return fallback_search(query, top_k)
     
     try:
-        # Phase 1: TF-IDF検索
-        print(f"=== TF-IDF検索開始: '{query}' ===")
-        
-        # クエリをベクトル化
-        query_vector = vectorizer.transform([query])
-        
-        # クエリベクトルの詳細確認
-        query_features = query_vector.toarray()[0]
-        non_zero_features = query_features[query_features > 0]
-        print(f"クエリベクトル非ゼロ要素数: {len(non_zero_features)}")
+        print(f"=== ハイブリッド検索開始: '{query}' (統合方式: {SEARCH_FUSION_METHOD}) ===")
         
-        if len(non_zero_features) == 0:
-            print("クエリが語彙に含まれていません - フォールバック検索に切り替え")
-            return fallback_search(query, top_k)
-        
-        # コサイン類似度計算
-        similarities = cosine_similarity(query_vector, tfidf_matrix).flatten()
-        
-        # 詳細デバッグ情報
-        max_sim = similarities.max()
-        positive_count = (similarities > 0).sum()
-        significant_count = (similarities > 0.01).sum()
-        
-        print(f"最大類似度: {max_sim:.6f}")
-        print(f"類似度>0の件数: {positive_count}")
-        print(f"類似度>0.01の件数: {significant_count}")
-        
-        # 上位候補を取得
-        top_indices = similarities.argsort()[-top_k*2:][::-1]  # 余裕をもって多めに取得
-        
-        tfidf_results = []
-        for idx in top_indices:
-            if similarities[idx] > 0.001:  # 閾値をさらに下げる
-                patent = patent_df.iloc[idx]
-                tfidf_results.append({
-                    'index': int(idx),
-                    'similarity': float(similarities[idx]),
-                    'application_number': patent.get('出願番号', ''),
-                    'name': patent.get('名称', ''),
-                    'applicant': patent.get('筆頭出願人', ''),
-                    'inventor': patent.get('発明者 1', ''),
-                    'match_type': 'tfidf'
-                })
-        
-        print(f"TF-IDF検索結果: {len(tfidf_results)}件")
-        
-        # Phase 2: 結果が不十分な場合はフォールバック検索を併用
-        if len(tfidf_results) < top_k:
-            print("=== フォールバック検索を併用 ===")
-            fallback_results = fallback_search(query, top_k)
-            
-            # 結果をマージ（重複除去）
-            all_results = tfidf_results.copy()
-            used_indices = {r['index'] for r in tfidf_results}
-            
-            for fb_result in fallback_results:
-                if fb_result['index'] not in used_indices:
-                    all_results.append(fb_result)
-                    if len(all_results) >= top_k:
-                        break
-            
-            # 類似度順でソート
-            all_results.sort(key=lambda x: x['similarity'], reverse=True)
-            final_results = all_results[:top_k]
-            
-        else:
-            final_results = tfidf_results[:top_k]
+        final_results = hybrid_rank(query, top_k)
         
         print(f"最終検索結果: {len(final_results)}件")
-        for i, result in enumerate(final_results):
-            print(f"{i+1}. [{result['similarity']:.4f}] {result['name'][:50]}... ({result['match_type']})")
+        for i, result in enumerate(final_results[:10]):
+            print(f"{i+1}. [{result['rank_score']:.4f}] {result['name'][:50]}... ({result['match_type']})")
         
         return final_results
         
     except Exception as e:
-        print(f"TF-IDF検索エラー: {e} - フォールバック検索に切り替え")
+        print(f"ハイブリッド検索エラー: {e} - フォールバック検索に切り替え")
         return fallback_search(query, top_k)
 
+# === 入力補完 ===
+
+def normalize_suggest_text(text):
+    """入力補完の照合用に正規化（全角・半角の統一、空白の圧縮、小文字化）"""
+    return ' '.join(unicodedata.normalize('NFKC', str(text)).split()).lower()
+
+def build_suggest_index(df, fitted_vectorizer, matrix):
+    """語彙・名称・出願人からソート済み配列のプレフィックス索引を構築
+    
+    重みは語彙なら文書頻度、名称・出願人なら該当特許件数。
+    1〜2文字のプレフィックスは一致範囲が広いため、上位候補を構築時に計算しておく。
+    """
+    candidates = {}  # 正規化キー -> [表示文字列, 重み, 種別]
+    
+    def add(text, weight, kind):
+        key = normalize_suggest_text(text)
+        if not key:
+            return
+        entry = candidates.get(key)
+        if entry is None:
+            candidates[key] = [' '.join(str(text).split()), weight, kind]
+        elif kind == entry[2]:
+            entry[1] += weight
+        elif weight > entry[1]:
+            candidates[key] = [' '.join(str(text).split()), weight, kind]
+    
+    # 1. TF-IDF語彙（文書頻度は索引構築時に一度だけ計算）
+    document_frequencies = np.diff(matrix.tocsc().indptr)
+    for term, frequency in zip(fitted_vectorizer.get_feature_names_out(), document_frequencies):
+        add(term, int(frequency), 'term')
+    
+    # 2. 名称
+    if '名称' in df.columns:
+        for title in df['名称']:
+            add(title, 1, 'title')
+    
+    # 3. 出願人（筆頭出願人・出願人 1〜）
+    applicant_cols = ['筆頭出願人'] + [col for col in df.columns if col.startswith('出願人')]
+    for _, row in df[[col for col in applicant_cols if col in df.columns]].iterrows():
+        for applicant in set(str(value) for value in row if value):
+            add(applicant, 1, 'applicant')
+    
+    keys = sorted(candidates)
+    entries = [tuple(candidates[key]) for key in keys]
+    
+    # 全候補の表示順位（重みの大きい順、同点なら短い候補を優先）
+    order = sorted(range(len(keys)), key=lambda i: (-entries[i][1], len(keys[i]), keys[i]))
+    ranks = np.empty(len(keys), dtype=np.int64)
+    ranks[order] = np.arange(len(keys))
+    
+    # 短いプレフィックスごとの上位候補（順位順に最大SUGGEST_LIMIT_MAX件）
+    short_prefix_top = {}
+    for i in order:
+        for length in range(1, min(SUGGEST_PRECOMPUTED_PREFIX_LEN, len(keys[i])) + 1):
+            top = short_prefix_top.setdefault(keys[i][:length], [])
+            if len(top) < SUGGEST_LIMIT_MAX:
+                top.append(i)
+    
+    return keys, entries, ranks, short_prefix_top
+
+def suggest_queries(prefix, limit=8):
+    """プレフィックスに一致する候補を重み順に返す（TF-IDF行列は参照しない）"""
+    if suggest_index is None:
+        return []
+    
+    prefix = normalize_suggest_text(prefix)
+    if not prefix:
+        return []
+    
+    keys, entries, ranks, short_prefix_top = suggest_index
+    
+    if len(prefix) <= SUGGEST_PRECOMPUTED_PREFIX_LEN:
+        top = short_prefix_top.get(prefix, [])[:limit]
+    else:
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + '\U0010ffff', lo)
+        
+        # 一致範囲から順位の小さい limit 件を選ぶ（numpyで部分ソート）
+        window = ranks[lo:hi]
+        if len(window) > limit:
+            picked = np.argpartition(window, limit)[:limit]
+        else:
+            picked = np.arange(len(window))
+        top = (lo + picked[np.argsort(window[picked])]).tolist()
+    
+    return [
+        {'text': entries[i][0], 'weight': entries[i][1], 'type': entries[i][2]}
+        for i in top
+    ]
+
+# === 検索結果キャッシュ・カーソル ===
+
+# カーソルは改ざん防止のため SECRET_KEY で署名する
+cursor_serializer = URLSafeSerializer(config.SECRET_KEY, salt='search-cursor')
+
+def normalize_search_query(query):
+    """キャッシュキー用にクエリを正規化（検索結果が変わらない範囲のみ）"""
+    # TF-IDF・フォールバック検索はいずれも小文字化して照合するため大小文字は区別しない
+    return query.strip().lower()
+
+def make_search_cache_key(mode, payload):
+    """検索モード・正規化済みクエリ・インデックス版からキャッシュキーを生成"""
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return f"{mode}:{index_version}:{digest}"
+
+def estimate_ranking_size(cache_key, ranking):
+    """キャッシュエントリのおおよそのメモリ使用量（バイト）を見積もる"""
+    size = sys.getsizeof(cache_key) + sys.getsizeof(ranking)
+    for entry in ranking:
+        size += sys.getsizeof(entry) + sum(sys.getsizeof(value) for value in entry)
+        scores = entry[3]
+        if scores:
+            size += sum(sys.getsizeof(value) for value in scores.values())
+    return size
+
+def get_cached_ranking(cache_key):
+    """キャッシュ済みランキングを取得（LRU順を更新）"""
+    with search_result_cache_lock:
+        cached = search_result_cache.get(cache_key)
+        if cached is None:
+            return None
+        search_result_cache.move_to_end(cache_key)
+        return cached[0]
+
+def put_cached_ranking(cache_key, ranking):
+    """ランキングをキャッシュに格納し、メモリ上限を超えた分を古い順に破棄"""
+    global search_result_cache_bytes
+    
+    size = estimate_ranking_size(cache_key, ranking)
+    if size > SEARCH_CACHE_MAX_BYTES:
+        return
+    
+    with search_result_cache_lock:
+        if cache_key in search_result_cache:
+            search_result_cache_bytes -= search_result_cache.pop(cache_key)[1]
+        search_result_cache[cache_key] = (ranking, size)
+        search_result_cache_bytes += size
+        
+        while search_result_cache_bytes > SEARCH_CACHE_MAX_BYTES:
+            _, (_, evicted_size) = search_result_cache.popitem(last=False)
+            search_result_cache_bytes -= evicted_size
+
+def clear_search_cache():
+    """検索結果キャッシュを全て破棄"""
+    global search_result_cache_bytes
+    
+    with search_result_cache_lock:
+        search_result_cache.clear()
+        search_result_cache_bytes = 0
+
+def ranking_from_results(results):
+    """検索結果をキャッシュ用の (index, similarity, match_type, scores, rank_score) リストに変換"""
+    return [
+        (r['index'], r['similarity'], r['match_type'], r.get('scores'), r.get('rank_score'))
+        for r in results
+    ]
+
+def build_search_result(index, similarity, match_type, scores=None, rank_score=None):
+    """ランキングのエントリから検索結果レスポンスを組み立てる"""
+    patent = patent_df.iloc[index]
+    result = {
+        'index': int(index),
+        'similarity': float(similarity),
+        'application_number': patent.get('出願番号', ''),
+        'name': patent.get('名称', ''),
+        'applicant': patent.get('筆頭出願人', ''),
+        'inventor': patent.get('発明者 1', ''),
+        'match_type': match_type
+    }
+    if scores:
+        result['scores'] = scores
+    if rank_score is not None:
+        result['rank_score'] = float(rank_score)
+    return result
+
+def parse_page_size(value, default):
+    """リクエストされた表示件数を 1〜SEARCH_PAGE_SIZE_MAX の範囲に丸める"""
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(page_size, SEARCH_PAGE_SIZE_MAX))
+
+def encode_search_cursor(state):
+    """ページング状態を署名付きの不透明なカーソル文字列に変換"""
+    return cursor_serializer.dumps(state)
+
+def decode_search_cursor(cursor):
+    """カーソル文字列を検証してページング状態を復元（不正な場合はNone）"""
+    if not isinstance(cursor, str):
+        return None
+    
+    try:
+        state = cursor_serializer.loads(cursor)
+    except BadSignature:
+        return None
+    
+    required = {'m': str, 'q': str, 'k': str, 'o': int, 'n': int, 'v': int}
+    if not isinstance(state, dict):
+        return None
+    for field, field_type in required.items():
+        if not isinstance(state.get(field), field_type):
+            return None
+    return state
+
+def get_search_page(mode, query, cache_key, compute_ranking, offset, page_size, cursor_extra=None):
+    """キャッシュ済みランキングを切り出して1ページ分を返す（未キャッシュなら検索を実行）
+    
+    cursor_extra: キャッシュから追い出された場合の再計算に必要な情報（カーソルに含める）
+    戻り値の total_count_capped は、件数が保持候補数の上限に達している（実際はそれ以上ある可能性がある）ことを示す。
+    """
+    ranking = get_cached_ranking(cache_key)
+    if ranking is None:
+        ranking = compute_ranking()
+        put_cached_ranking(cache_key, ranking)
+    
+    page = ranking[offset:offset + page_size]
+    next_offset = offset + len(page)
+    
+    next_cursor = None
+    if page and next_offset < len(ranking):
+        next_cursor = encode_search_cursor({
+            'm': mode,
+            'q': query,
+            'k': cache_key,
+            'o': next_offset,
+            'n': page_size,
+            'v': index_version,
+            **(cursor_extra or {})
+        })
+    
+    total_count_capped = len(ranking) >= SEARCH_CACHE_MAX_CANDIDATES
+    return page, next_cursor, len(ranking), total_count_capped
+
+def resolve_search_cursor(data, mode):
+    """リクエストのカーソルを検証（エラー時は (None, エラーレスポンス) を返す）"""
+    state = decode_search_cursor(data.get('cursor'))
+    if state is None or state['m'] != mode or state['o'] < 0 or state['n'] < 1:
+        return None, (jsonify({'error': '無効なカーソルです'}), 400)
+    if state['v'] != index_version:
+        return None, (jsonify({'error': '検索データが更新されました。再検索してください'}), 409)
+    return state, None
+
 # === ルート定義 ===
 
 @app.route('/')
@@ -538,63 +933,152 @@ def index():
 
 @app.route('/search_patents', methods=['POST'])
 def search_patents_endpoint():
-    """特許検索API"""
+    """特許検索API（cursor指定で続きのページを返す）"""
     try:
         data = request.get_json()
-        query = data.get('query', '').strip()
         
-        if not query:
-            return jsonify({'error': '検索キーワードを入力してください'}), 400
-        
-        # 特許検索実行
-        results = search_patents(query)
+        if data.get('cursor'):
+            # 続きのページ：キャッシュ済みランキングを切り出す
+            state, error_response = resolve_search_cursor(data, 'simple')
+            if error_response:
+                return error_response
+            query = state['q']
+            cache_key = state['k']
+            offset = state['o']
+            page_size = state['n']
+        else:
+            query = data.get('query', '').strip()
+            
+            if not query:
+                return jsonify({'error': '検索キーワードを入力してください'}), 400
+            
+            cache_key = make_search_cache_key('simple', normalize_search_query(query))
+            offset = 0
+            page_size = parse_page_size(data.get('limit'), 3)
+        
+        # 特許検索実行（同一クエリはキャッシュから取得）
+        page, next_cursor, total_count, total_count_capped = get_search_page(
+            'simple', query, cache_key,
+            lambda: ranking_from_results(search_patents(query, SEARCH_CACHE_MAX_CANDIDATES)),
+            offset, page_size
+        )
         
-        if not results:
+        if not page:
             return jsonify({'error': '該当する特許が見つかりませんでした'}), 404
         
-        return jsonify({'results': results})
+        return jsonify({
+            'results': [build_search_result(*entry) for entry in page],
+            'next_cursor': next_cursor,
+            'total_count': total_count,
+            'total_count_capped': total_count_capped
+        })
         
     except Exception as e:
         return jsonify({'error': f'検索エラー: {str(e)}'}), 500
 
+def enhance_advanced_result(result):
+    """高度検索の結果に出願日・登録日などの追加情報を付与"""
+    patent = patent_df.iloc[result['index']]
+    enhanced_result = result.copy()
+    enhanced_result.update({
+        'application_date': patent.get('出願日', ''),
+        'registration_date': patent.get('登録日', ''),
+        'law_type': patent.get('法別', ''),
+        'department': patent.get('所管部課名', ''),
+        'summary_preview': patent.get('要約', '')[:100] + '...' if len(str(patent.get('要約', ''))) > 100 else patent.get('要約', '')
+    })
+    return enhanced_result
+
 @app.route('/search_patents_advanced', methods=['POST'])
 def search_patents_advanced_endpoint():
-    """自然言語による高度な特許検索API"""
+    """自然言語による高度な特許検索API（cursor指定で続きのページを返す）"""
     try:
         data = request.get_json()
-        query = data.get('query', '').strip()
         
-        if not query:
-            return jsonify({'error': '検索クエリを入力してください'}), 400
+        if patent_df is None:
+            return jsonify({'error': '該当する特許が見つかりませんでした'}), 404
         
-        # 高度な特許検索実行
-        results = advanced_search(query)
+        if data.get('cursor'):
+            # 続きのページ：キャッシュ済みランキングを切り出す
+            state, error_response = resolve_search_cursor(data, 'advanced')
+            if error_response:
+                return error_response
+            query = state['q']
+            cache_key = state['k']
+            offset = state['o']
+            page_size = state['n']
+            
+            # 1ページ目と同じ解析結果から再計算できるよう、カーソルの解析結果を使う
+            if not isinstance(state.get('p'), str):
+                return jsonify({'error': '無効なカーソルです'}), 400
+            parsed_query = json.loads(state['p'])
+            parsed_query_json = state['p']
+        else:
+            query = data.get('query', '').strip()
+            
+            if not query:
+                return jsonify({'error': '検索クエリを入力してください'}), 400
+            
+            # 自然言語クエリを解析し、解析結果をキャッシュキーとする
+            parsed_query = parse_natural_query_cached(query)
+            offset = 0
+            page_size = parse_page_size(data.get('limit') or parsed_query.get('limit'), 3)
+            
+            # limit はページサイズとしてのみ使うため、ランキングのキーからは除外
+            parsed_query = {k: v for k, v in parsed_query.items() if k != 'limit'}
+            parsed_query_json = json.dumps(parsed_query, ensure_ascii=False, sort_keys=True)
+            cache_key = make_search_cache_key('advanced', parsed_query_json)
+        
+        def compute_ranking():
+            return ranking_from_results(
+                advanced_search_parsed(query, parsed_query, SEARCH_CACHE_MAX_CANDIDATES)
+            )
+        
+        # 高度な特許検索実行（同一の解析結果はキャッシュから取得）
+        page, next_cursor, total_count, total_count_capped = get_search_page(
+            'advanced', query, cache_key, compute_ranking, offset, page_size,
+            cursor_extra={'p': parsed_query_json}
+        )
         
-        if not results:
+        if not page:
             return jsonify({'error': '該当する特許が見つかりませんでした'}), 404
         
+        # 日付順の指定はランキング全体ではなく、表示するページ（関連度上位の範囲）内で適用
+        page_results = sort_by_registration_date(
+            [build_search_result(*entry) for entry in page],
+            parsed_query.get('sort_order', 'relevance')
+        )
+        
         # 追加情報を含めて返す
-        enhanced_results = []
-        for result in results:
-            patent = patent_df.iloc[result['index']]
-            enhanced_result = result.copy()
-            enhanced_result.update({
-                'application_date': patent.get('出願日', ''),
-                'registration_date': patent.get('登録日', ''),
-                'law_type': patent.get('法別', ''),
-                'department': patent.get('所管部課名', ''),
-                'summary_preview': patent.get('要約', '')[:100] + '...' if len(str(patent.get('要約', ''))) > 100 else patent.get('要約', '')
-            })
-            enhanced_results.append(enhanced_result)
+        enhanced_results = [enhance_advanced_result(result) for result in page_results]
         
         return jsonify({
             'results': enhanced_results,
-            'search_type': 'advanced_natural_language'
+            'search_type': 'advanced_natural_language',
+            'next_cursor': next_cursor,
+            'total_count': total_count,
+            'total_count_capped': total_count_capped
         })
         
     except Exception as e:
         return jsonify({'error': f'高度検索エラー: {str(e)}'}), 500
 
+@app.route('/suggest', methods=['GET'])
+def suggest_endpoint():
+    """検索キーワードの入力補完API"""
+    try:
+        prefix = request.args.get('q', '')
+        
+        try:
+            limit = max(1, min(int(request.args.get('limit', 8)), SUGGEST_LIMIT_MAX))
+        except ValueError:
+            limit = 8
+        
+        return jsonify({'suggestions': suggest_queries(prefix, limit)})
+        
+    except Exception as e:
+        return jsonify({'error': f'入力補完エラー: {str(e)}'}), 500
+
 @app.route('/select_patent', methods=['POST'])
 def select_patent_endpoint():
     """特許選択API"""